@@ -1,13 +1,229 @@
 import pandas as pd
+import numpy as np
 import json
 from rdflib import Graph, Namespace, URIRef, Literal, RDF, RDFS
 from rdflib.namespace import XSD
+import re
 import uuid
-from typing import Dict, List, Any
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any
+
+# Store para el grafo: si oxrdflib está instalado (dependencia opcional) se
+# usa el backend Oxigraph, implementado en Rust y mucho más rápido para carga
+# masiva que el store por defecto de rdflib
+try:
+    import oxrdflib  # noqa: F401
+    GRAPH_STORE = 'Oxigraph'
+except ImportError:
+    GRAPH_STORE = 'default'
+
+# Representaciones en string de los tipos XSD, calculadas una sola vez
+XSD_INTEGER_STR = str(XSD.integer)
+XSD_DECIMAL_STR = str(XSD.decimal)
+XSD_BOOLEAN_STR = str(XSD.boolean)
+XSD_ANYURI_STR = str(XSD.anyURI)
+XSD_STRING_STR = str(XSD.string)
+
+
+def _coerce_int(values, cells, valid, datatype):
+    is_int = values.str.fullmatch(r'[+-]?\d+').to_numpy()
+    return [
+        Literal(int(cells[i]), datatype=XSD.integer) if is_int[i]
+        else Literal(cells[i], datatype=XSD.string)
+        for i in valid
+    ]
+
+
+# Numba es una dependencia opcional: si está instalada, el parseo de enteros
+# se hace con un kernel JIT que recorre los bytes de toda la columna en
+# código nativo, sin crear objetos intermedios de Python por celda
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+_INT_FULLMATCH = re.compile(r'[+-]?\d+').fullmatch
+
+if njit is not None:
+    @njit(cache=True)
+    def _parse_int_cells(buf, offsets, out, ok):
+        for i in range(out.shape[0]):
+            start = offsets[i]
+            end = offsets[i + 1]
+            sign = 1
+            if start < end and (buf[start] == 43 or buf[start] == 45):  # '+' / '-'
+                if buf[start] == 45:
+                    sign = -1
+                start += 1
+            # Celdas vacías o con más de 18 dígitos (desborde de int64) se
+            # marcan inválidas y las rescata el fallback en Python
+            if start == end or end - start > 18:
+                ok[i] = False
+                continue
+            value = 0
+            good = True
+            for j in range(start, end):
+                digit = np.int64(buf[j]) - 48
+                if digit < 0 or digit > 9:
+                    good = False
+                    break
+                value = value * 10 + digit
+            out[i] = sign * value
+            ok[i] = good
+
+    def _coerce_int_jit(values, cells, valid, datatype):
+        encoded = [cells[i].encode('utf-8') for i in valid]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        for k, raw in enumerate(encoded):
+            offsets[k + 1] = offsets[k] + len(raw)
+        buf = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        out = np.empty(len(encoded), dtype=np.int64)
+        ok = np.empty(len(encoded), dtype=np.bool_)
+        _parse_int_cells(buf, offsets, out, ok)
+        return [
+            Literal(int(out[k]), datatype=XSD.integer) if ok[k]
+            else (Literal(int(cells[i]), datatype=XSD.integer) if _INT_FULLMATCH(cells[i])
+                  else Literal(cells[i], datatype=XSD.string))
+            for k, i in enumerate(valid)
+        ]
+
+
+def _coerce_float(values, cells, valid, datatype):
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy()
+    return [
+        Literal(float(numbers[i]), datatype=XSD.decimal) if not np.isnan(numbers[i])
+        else Literal(cells[i], datatype=XSD.string)
+        for i in valid
+    ]
+
+
+# Solo existen dos literales booleanos posibles: se crean una única vez
+_LITERAL_TRUE = Literal(True, datatype=XSD.boolean)
+_LITERAL_FALSE = Literal(False, datatype=XSD.boolean)
+
+# Valores que se interpretan como verdadero, construidos una sola vez
+_BOOL_TRUE = frozenset({'true', '1', 'yes', 'sí'})
+
+
+def _coerce_bool(values, cells, valid, datatype):
+    bools = values.str.lower().isin(_BOOL_TRUE).to_numpy()
+    return [_LITERAL_TRUE if bools[i] else _LITERAL_FALSE for i in valid]
+
+
+def _coerce_uri(values, cells, valid, datatype):
+    is_uri = values.str.startswith('http').to_numpy()
+    # Cache por columna: los valores repetidos reusan el mismo objeto
+    cache = {}
+    objects = []
+    for i in valid:
+        value = cells[i]
+        obj = cache.get(value)
+        if obj is None:
+            obj = URIRef(value) if is_uri[i] else Literal(value, datatype=XSD.anyURI)
+            cache[value] = obj
+        objects.append(obj)
+    return objects
+
+
+def _coerce_default(values, cells, valid, datatype):
+    # Cache por columna: las columnas categóricas (ciudad, empresa, etc.)
+    # repiten valores, así cada Literal distinto se construye una sola vez
+    cache = {}
+    objects = []
+    for i in valid:
+        value = cells[i]
+        obj = cache.get(value)
+        if obj is None:
+            obj = Literal(value, datatype=datatype)
+            cache[value] = obj
+        objects.append(obj)
+    return objects
+
+
+# Tabla de despacho: URI del tipo de dato -> función de coerción por columna
+COERCERS = {
+    XSD_INTEGER_STR: _coerce_int_jit if njit is not None else _coerce_int,
+    XSD_DECIMAL_STR: _coerce_float,
+    XSD_BOOLEAN_STR: _coerce_bool,
+    XSD_ANYURI_STR: _coerce_uri,
+}
+
+
+@dataclass
+class TripletTable:
+    """
+    Representación columnar de las tripletas: cuatro listas paralelas en
+    lugar de un diccionario por tripleta, lo que reduce a la mitad la
+    memoria por entrada en CPython. Iterarla produce los mismos
+    diccionarios que retornaba la versión anterior.
+    """
+
+    subjects: List[str] = field(default_factory=list)
+    predicates: List[str] = field(default_factory=list)
+    objects: List[str] = field(default_factory=list)
+    datatypes: List[str] = field(default_factory=list)
+
+    def append(self, subject: str, predicate: str, obj: str, datatype: str):
+        self.subjects.append(subject)
+        self.predicates.append(predicate)
+        self.objects.append(obj)
+        self.datatypes.append(datatype)
+
+    def __len__(self) -> int:
+        return len(self.subjects)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for subject, predicate, obj, datatype in zip(
+                self.subjects, self.predicates, self.objects, self.datatypes):
+            yield {
+                'subject': subject,
+                'predicate': predicate,
+                'object': obj,
+                'dataType': datatype
+            }
+
+
+class RDFResult:
+    """
+    Resultado de la conversión CSV a RDF.
+
+    Las serializaciones (turtle, rdf_xml, n_triples) se calculan de forma
+    perezosa la primera vez que se acceden, así los formatos que el llamador
+    no usa nunca se generan. Soporta acceso por clave como el diccionario
+    que se retornaba antes: result['turtle'] equivale a result.turtle.
+    """
+
+    def __init__(self, graph: Graph, triplets: TripletTable, json_ld: Dict[str, Any]):
+        # El grafo es público para que las utilidades (query_triplets,
+        # export_formats) puedan reutilizarlo sin reconstruirlo
+        self.graph = graph
+        self.triplets = triplets
+        self.json_ld = json_ld
+
+    @cached_property
+    def turtle(self) -> str:
+        return self.graph.serialize(format='turtle')
+
+    @cached_property
+    def rdf_xml(self) -> str:
+        return self.graph.serialize(format='xml')
+
+    @cached_property
+    def n_triples(self) -> str:
+        return self.graph.serialize(format='nt')
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        setattr(self, key, value)
+
 
 class CSVToRDFProcessor:
     def __init__(self):
-        self.graph = Graph()
+        self.graph = Graph(store=GRAPH_STORE)
         self.base_uri = "http://example.org/"
         self.namespace = Namespace(self.base_uri)
         
@@ -17,101 +233,225 @@ class CSVToRDFProcessor:
         self.graph.bind("rdfs", RDFS)
         self.graph.bind("xsd", XSD)
     
-    def process_csv_data(self, csv_data: Dict[str, Any], column_mapping: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    def process_csv_data(self, csv_data: Dict[str, Any], column_mapping: Dict[str, Dict[str, str]],
+                         return_triplets: bool = True) -> RDFResult:
         """
         Procesa datos CSV y los convierte a RDF usando el mapeo de columnas proporcionado
-        
+
+        El JSON-LD se construye en la misma pasada que las tripletas, sin
+        recorrer el resultado una segunda vez. Con return_triplets=False se
+        omite la tabla de tripletas (queda None en el resultado) para no
+        mantener una copia extra en memoria.
+
         Args:
             csv_data: Diccionario con 'headers' y 'rows'
             column_mapping: Mapeo de columnas a propiedades RDF
-            
+            return_triplets: Si se debe construir la tabla de tripletas
+
         Returns:
-            Diccionario con tripletas y JSON-LD
+            RDFResult con tripletas, JSON-LD y serializaciones perezosas
         """
         headers = csv_data['headers']
         rows = csv_data['rows']
-        
-        triplets = []
-        
-        # Procesar cada fila
-        for row_index, row in enumerate(rows):
-            # Crear URI único para cada entidad
-            entity_uri = f"{self.base_uri}entity_{row_index + 1}"
-            subject = URIRef(entity_uri)
-            
-            # Procesar cada columna mapeada
-            for col_index, header in enumerate(headers):
-                if header in column_mapping and col_index < len(row):
-                    mapping = column_mapping[header]
-                    cell_value = row[col_index].strip()
-                    
-                    if cell_value:  # Solo procesar valores no vacíos
-                        predicate = URIRef(mapping['rdfProperty'])
-                        
-                        # Determinar el tipo de dato y crear el objeto apropiado
-                        datatype_uri = mapping['dataType']
-                        
-                        if datatype_uri == str(XSD.integer):
-                            try:
-                                obj = Literal(int(cell_value), datatype=XSD.integer)
-                            except ValueError:
-                                obj = Literal(cell_value, datatype=XSD.string)
-                        elif datatype_uri == str(XSD.decimal):
-                            try:
-                                obj = Literal(float(cell_value), datatype=XSD.decimal)
-                            except ValueError:
-                                obj = Literal(cell_value, datatype=XSD.string)
-                        elif datatype_uri == str(XSD.boolean):
-                            bool_value = cell_value.lower() in ['true', '1', 'yes', 'sí']
-                            obj = Literal(bool_value, datatype=XSD.boolean)
-                        elif datatype_uri == str(XSD.anyURI):
-                            obj = URIRef(cell_value) if cell_value.startswith('http') else Literal(cell_value, datatype=XSD.anyURI)
-                        else:
-                            obj = Literal(cell_value, datatype=URIRef(datatype_uri))
-                        
-                        # Agregar tripleta al grafo
-                        self.graph.add((subject, predicate, obj))
-                        
-                        # Agregar a la lista de tripletas para retornar
-                        triplets.append({
-                            'subject': str(subject),
-                            'predicate': str(predicate),
-                            'object': str(obj),
-                            'dataType': datatype_uri
-                        })
-        
-        # Generar JSON-LD
-        json_ld = self.generate_json_ld(triplets)
-        
+
+        col_plan = self._build_column_plan(headers, column_mapping)
+        context_map = self._build_context_map(column_mapping)
+
+        triplets = TripletTable() if return_triplets else None
+        json_subjects = {}
+        self._process_rows(headers, rows, col_plan, triplets,
+                           json_subjects=json_subjects, context_map=context_map)
+
+        json_ld = {
+            '@context': self._json_ld_context(context_map),
+            '@graph': list(json_subjects.values())
+        }
+
+        return RDFResult(self.graph, triplets, json_ld)
+
+    def process_csv_stream(self, headers: List[str], row_iter: Iterable[List[str]],
+                           column_mapping: Dict[str, Dict[str, str]],
+                           chunk_size: int = 100_000) -> Iterator[int]:
+        """
+        Procesa un CSV grande por bloques sin materializar todas las filas
+
+        Las filas se consumen de `row_iter` en bloques de `chunk_size` y las
+        tripletas de cada bloque se insertan al grafo con addN, así la memoria
+        queda acotada por el tamaño del bloque. Es un generador que produce el
+        número de tripletas agregadas por bloque, útil para mostrar progreso.
+
+        Args:
+            headers: Encabezados del CSV
+            row_iter: Iterable de filas (por ejemplo un csv.reader)
+            column_mapping: Mapeo de columnas a propiedades RDF
+            chunk_size: Filas por bloque
+        """
+        col_plan = self._build_column_plan(headers, column_mapping)
+
+        row_iter = iter(row_iter)
+        row_offset = 0
+        while True:
+            chunk = list(islice(row_iter, chunk_size))
+            if not chunk:
+                break
+            yield self._process_rows(headers, chunk, col_plan, None, row_offset)
+            row_offset += len(chunk)
+
+    def _build_column_plan(self, headers: List[str],
+                           column_mapping: Dict[str, Dict[str, str]]) -> Dict[str, tuple]:
+        """
+        Plan por columna: los URIRef de predicado y tipo de dato y la función
+        de coerción se construyen una sola vez, no en cada iteración
+        """
+        header_set = set(headers)
         return {
-            'triplets': triplets,
-            'json_ld': json_ld,
-            'turtle': self.graph.serialize(format='turtle'),
-            'rdf_xml': self.graph.serialize(format='xml'),
-            'n_triples': self.graph.serialize(format='nt')
+            header: (
+                URIRef(mapping['rdfProperty']),
+                mapping['dataType'],
+                URIRef(mapping['dataType']),
+                COERCERS.get(mapping['dataType'], _coerce_default)
+            )
+            for header, mapping in column_mapping.items()
+            if header in header_set
         }
-    
-    def generate_json_ld(self, triplets: List[Dict[str, str]]) -> Dict[str, Any]:
+
+    def _build_context_map(self, column_mapping: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+        """
+        Mapea cada URI de propiedad a un término corto sin colisiones
+
+        El término es el último segmento de la URI; si dos propiedades
+        distintas comparten segmento (p.ej. foaf:name y rdfs:name), las
+        siguientes usan el nombre del encabezado, y como último recurso la
+        URI completa, para no colapsar propiedades diferentes en una clave.
+        """
+        context_map = {}
+        used_terms = set()
+
+        for header, mapping in column_mapping.items():
+            prop = mapping['rdfProperty']
+            if prop in context_map:
+                continue
+
+            term = prop.rpartition('/')[2] or prop
+            if term in used_terms:
+                term = header if header not in used_terms else prop
+            context_map[prop] = term
+            used_terms.add(term)
+
+        return context_map
+
+    def _process_rows(self, headers: List[str], rows: List[List[str]],
+                      col_plan: Dict[str, tuple], triplets: 'TripletTable | None',
+                      row_offset: int = 0,
+                      json_subjects: 'Dict[str, Dict[str, Any]] | None' = None,
+                      context_map: 'Dict[str, str] | None' = None) -> int:
         """
-        Genera JSON-LD a partir de las tripletas
+        Procesa un bloque de filas y retorna cuántas tripletas agregó al grafo
+
+        Si se pasa `json_subjects`, las entradas del @graph JSON-LD se
+        construyen en esta misma pasada, fusionando lo que antes era un
+        segundo recorrido sobre las tripletas.
+        """
+        # Cargar el bloque de filas una sola vez en un DataFrame (las filas
+        # cortas se rellenan con NaN, las celdas sobrantes se descartan)
+        df = pd.DataFrame((row[:len(headers)] for row in rows), columns=headers, dtype=object)
+
+        # Normalizar cada columna mapeada una sola vez durante la carga:
+        # relleno de vacíos y strip en un único recorrido en C por columna
+        # (las columnas sin mapeo no se tocan)
+        for header in col_plan:
+            df[header] = df[header].fillna('').astype(str).str.strip()
+
+        # URIs de sujeto precalculadas, una por fila
+        entity_uris = [f"{self.base_uri}entity_{row_offset + i + 1}" for i in range(len(df))]
+        subjects = [URIRef(uri) for uri in entity_uris]
+
+        quads = []
+
+        # Procesar cada columna mapeada (la coerción de tipos se hace de forma
+        # vectorizada por columna, no celda por celda)
+        for header in headers:
+            if header not in col_plan:
+                continue
+
+            predicate, datatype_uri, datatype, coerce = col_plan[header]
+
+            values = df[header]
+            cells = values.to_numpy()
+            # Solo procesar valores no vacíos
+            valid = np.flatnonzero((values != '').to_numpy())
+
+            # Crear los objetos apropiados según el tipo de dato de la columna
+            objects = coerce(values, cells, valid, datatype)
+
+            predicate_str = str(predicate)
+            # Clave corta y chequeo de tipo string, una vez por columna
+            pred_key = context_map.get(predicate_str) if context_map else None
+            if pred_key is None:
+                pred_key = predicate_str.rpartition('/')[2] or predicate_str
+            is_string = datatype_uri == XSD_STRING_STR
+
+            for i, obj in zip(valid, objects):
+                # Acumular la tripleta para insertarla en lote
+                quads.append((subjects[i], predicate, obj, self.graph))
+
+                obj_str = str(obj)
+
+                # Agregar a la tabla de tripletas para retornar
+                if triplets is not None:
+                    triplets.append(entity_uris[i], predicate_str, obj_str, datatype_uri)
+
+                # Construir la entrada JSON-LD del sujeto en la misma pasada
+                if json_subjects is not None:
+                    entity_uri = entity_uris[i]
+                    entry = json_subjects.get(entity_uri)
+                    if entry is None:
+                        entry = {'@id': entity_uri}
+                        json_subjects[entity_uri] = entry
+
+                    value = obj_str if is_string else {'@value': obj_str, '@type': datatype_uri}
+
+                    if pred_key in entry:
+                        # Si ya existe, convertir a lista
+                        if not isinstance(entry[pred_key], list):
+                            entry[pred_key] = [entry[pred_key]]
+                        entry[pred_key].append(value)
+                    else:
+                        entry[pred_key] = value
+
+        # Insertar todas las tripletas del bloque de una sola vez (amortiza
+        # el costo por llamada del store de rdflib)
+        self.graph.addN(quads)
+        return len(quads)
+
+    def generate_json_ld(self, triplets: Iterable[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Genera JSON-LD a partir de las tripletas (lista de diccionarios o TripletTable)
         """
         # Agrupar tripletas por sujeto
         subjects = {}
-        
+
+        # Cache de clave corta por predicado: hay pocos predicados distintos,
+        # así que la simplificación se calcula una vez por URI y no por tripleta
+        pred_key_cache = {}
+
         for triplet in triplets:
             subject = triplet['subject']
             predicate = triplet['predicate']
             obj = triplet['object']
-            datatype = triplet.get('dataType', str(XSD.string))
+            datatype = triplet.get('dataType', XSD_STRING_STR)
             
             if subject not in subjects:
                 subjects[subject] = {'@id': subject}
             
             # Simplificar el predicado para JSON-LD
-            pred_key = predicate.split('/')[-1] if '/' in predicate else predicate
+            pred_key = pred_key_cache.get(predicate)
+            if pred_key is None:
+                pred_key = predicate.rpartition('/')[2] or predicate
+                pred_key_cache[predicate] = pred_key
             
             # Crear el valor del objeto
-            if datatype == str(XSD.string):
+            if datatype == XSD_STRING_STR:
                 value = obj
             else:
                 value = {
@@ -128,18 +468,25 @@ class CSVToRDFProcessor:
             else:
                 subjects[subject][pred_key] = value
         
-        # Crear el contexto JSON-LD
+        return {
+            '@context': self._json_ld_context(),
+            '@graph': list(subjects.values())
+        }
+
+    def _json_ld_context(self, context_map: 'Dict[str, str] | None' = None) -> Dict[str, str]:
+        """
+        Crea el contexto JSON-LD, incluyendo los términos de las propiedades
+        mapeadas para que los consumidores puedan resolverlos a sus URIs
+        """
         context = {
             '@base': self.base_uri,
             'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
             'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
             'xsd': 'http://www.w3.org/2001/XMLSchema#'
         }
-        
-        return {
-            '@context': context,
-            '@graph': list(subjects.values())
-        }
+        if context_map:
+            context.update({term: uri for uri, term in context_map.items()})
+        return context
     
     def validate_rdf(self) -> Dict[str, Any]:
         """
@@ -173,7 +520,6 @@ if __name__ == "__main__":
         'rows': [
             ['Juan Pérez', '30', 'juan@email.com', 'Madrid'],
             ['María García', '25', 'maria@email.com', 'Barcelona'],
-            ['Carlos López', '35', 'carlos@email.com', '  '25', 'maria@email.com', 'Barcelona'],
             ['Carlos López', '35', 'carlos@email.com', 'Valencia']
         ]
     }
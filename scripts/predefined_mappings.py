@@ -1,8 +1,19 @@
-import pandas as pd
+import csv
 import json
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 import re
 
+# Patrones de normalización compilados una sola vez al cargar el módulo
+_NON_ALNUM = re.compile(r'[^a-z0-9_]')
+_MULTI_UNDERSCORE = re.compile(r'_+')
+
+
+@lru_cache(maxsize=1024)
+def _normalize_column_name(column_name: str) -> str:
+    normalized = _NON_ALNUM.sub('_', column_name.lower().strip())
+    return _MULTI_UNDERSCORE.sub('_', normalized).strip('_')
+
 
 class PredefinedMappings:
     def __init__(self):
@@ -32,6 +43,20 @@ class PredefinedMappings:
             }
         }
 
+        # Conjuntos de tokens por clave de plantilla, precalculados una sola
+        # vez para no re-tokenizar en cada comparación de similitud
+        self._token_sets = {
+            template_name: {
+                key: frozenset(key.split('_'))
+                for key in template["mappings"]
+            }
+            for template_name, template in self.templates.items()
+        }
+
+        # Cache de sugerencias por conjunto de encabezados (auto_map_columns
+        # y suggest_template suelen recibir los mismos encabezados)
+        self._suggest_cache = {}
+
     def get_template(self, template_name: str) -> Optional[Dict[str, Any]]:
         return self.templates.get(template_name)
 
@@ -57,7 +82,7 @@ class PredefinedMappings:
                 }
                 continue
 
-            best_match = self._find_best_match(normalized_header, template_mappings)
+            best_match = self._find_best_match(normalized_header, template_name)
             if best_match:
                 auto_mapping[header] = {
                     **template_mappings[best_match["key"]],
@@ -68,6 +93,11 @@ class PredefinedMappings:
         return auto_mapping
 
     def suggest_template(self, headers: List[str]) -> str:
+        cache_key = tuple(headers)
+        cached = self._suggest_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         template_scores = {}
 
         for template_name, template in self.templates.items():
@@ -81,34 +111,39 @@ class PredefinedMappings:
                     score += 2
                     continue
 
-                best_match = self._find_best_match(normalized_header, template_mappings)
+                best_match = self._find_best_match(normalized_header, template_name)
                 if best_match and best_match["confidence"] > 0.6:
                     score += best_match["confidence"]
 
             template_scores[template_name] = score / len(headers) if headers else 0
 
         best_template = max(template_scores.items(), key=lambda x: x[1])
-        return best_template[0] if best_template[1] > 0.3 else "general"
+        suggestion = best_template[0] if best_template[1] > 0.3 else "general"
+        self._suggest_cache[cache_key] = suggestion
+        return suggestion
 
     def _normalize_column_name(self, column_name: str) -> str:
-        normalized = column_name.lower().strip()
-        normalized = re.sub(r'[^a-z0-9_]', '_', normalized)
-        normalized = re.sub(r'_+', '_', normalized)
-        return normalized.strip('_')
+        return _normalize_column_name(column_name)
+
+    def _find_best_match(self, column_name: str, template_name: str) -> Optional[Dict[str, Any]]:
+        # La columna se tokeniza una sola vez, fuera del bucle sobre las
+        # claves de la plantilla
+        column_tokens = frozenset(column_name.split('_'))
 
-    def _find_best_match(self, column_name: str, template_mappings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         best_match = None
         best_confidence = 0.0
 
-        for template_key in template_mappings.keys():
-            confidence = self._calculate_similarity(column_name, template_key)
+        for template_key, key_tokens in self._token_sets[template_name].items():
+            confidence = self._calculate_similarity(column_name, template_key, column_tokens, key_tokens)
             if confidence > best_confidence and confidence > 0.6:
                 best_match = {"key": template_key, "confidence": confidence}
                 best_confidence = confidence
 
         return best_match
 
-    def _calculate_similarity(self, str1: str, str2: str) -> float:
+    def _calculate_similarity(self, str1: str, str2: str,
+                              tokens1: Optional[frozenset] = None,
+                              tokens2: Optional[frozenset] = None) -> float:
         str1, str2 = str1.lower(), str2.lower()
 
         if str1 == str2:
@@ -116,8 +151,8 @@ class PredefinedMappings:
         if str1 in str2 or str2 in str1:
             return 0.8
 
-        words1 = set(str1.split('_'))
-        words2 = set(str2.split('_'))
+        words1 = tokens1 if tokens1 is not None else frozenset(str1.split('_'))
+        words2 = tokens2 if tokens2 is not None else frozenset(str2.split('_'))
 
         intersection = words1 & words2
         return len(intersection) / max(len(words1), len(words2)) if intersection else 0.0
@@ -149,8 +184,10 @@ def get_auto_mapping(headers: List[str], template_name: str = None) -> Dict[str,
 
 
 def map_csv_file(csv_path: str, template_name: str = None) -> Dict[str, Any]:
-    df = pd.read_csv(csv_path, nrows=1)
-    headers = df.columns.tolist()
+    # Leer solo la línea de encabezados, sin pagar la inferencia de tipos
+    # de pandas (utf-8-sig descarta el BOM si el archivo lo trae)
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        headers = next(csv.reader(f), [])
     return get_auto_mapping(headers, template_name)
 
 
@@ -1,35 +1,126 @@
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, XSD
 import json
+import re
+from collections import Counter
 from typing import Dict, List, Any, Optional
 
+# Consultas SELECT de un solo patrón de tripleta, sin FILTER ni joins,
+# p.ej. "SELECT DISTINCT ?s WHERE { ?s <uri> ?o . }": se pueden responder
+# filtrando las tripletas directamente, sin el motor SPARQL de rdflib
+_SIMPLE_SELECT_RE = re.compile(
+    r'^\s*SELECT\s+(?P<distinct>DISTINCT\s+)?(?P<vars>\?\w+(?:\s+\?\w+)*)\s*'
+    r'WHERE\s*\{\s*(?P<s>\?\w+|<[^>]+>)\s+(?P<p>\?\w+|<[^>]+>)\s+(?P<o>\?\w+|<[^>]+>)'
+    r'\s*\.?\s*\}\s*$',
+    re.IGNORECASE)
+
+
 class RDFUtilities:
     """
     Utilidades adicionales para trabajar con datos RDF
     """
     
     @staticmethod
-    def query_triplets(triplets: List[Dict[str, str]], sparql_query: str) -> List[Dict[str, str]]:
+    def _build_graph(triplets: List[Dict[str, str]]) -> Graph:
         """
-        Ejecuta una consulta SPARQL simple sobre las tripletas
+        Construye un grafo rdflib a partir de las tripletas (inserción en lote)
         """
-        # Crear grafo temporal
         g = Graph()
-        
+        quads = []
+
         for triplet in triplets:
             subject = URIRef(triplet['subject'])
             predicate = URIRef(triplet['predicate'])
-            
+
             # Determinar si el objeto es URI o Literal
             obj_str = triplet['object']
-            if obj_str.startswith('http://') or obj_str.startswith('https://'):
+            if obj_str.startswith(('http://', 'https://')):
                 obj = URIRef(obj_str)
             else:
                 datatype = triplet.get('dataType', str(XSD.string))
                 obj = Literal(obj_str, datatype=URIRef(datatype))
-            
-            g.add((subject, predicate, obj))
-        
+
+            quads.append((subject, predicate, obj, g))
+
+        g.addN(quads)
+        return g
+
+    @staticmethod
+    def _query_triplets_fast(triplets: List[Dict[str, str]], match: 're.Match') -> Optional[List[Dict[str, str]]]:
+        """
+        Responde una consulta SELECT de un solo patrón filtrando las tripletas
+
+        Retorna None si la consulta pide variables que no aparecen en el
+        patrón (en ese caso se usa el motor SPARQL normal).
+        """
+        pattern = {
+            'subject': match.group('s'),
+            'predicate': match.group('p'),
+            'object': match.group('o')
+        }
+
+        constants = {}   # campo -> URI concreta que debe coincidir
+        var_fields = {}  # variable -> campos del patrón donde aparece
+        for field, term in pattern.items():
+            if term.startswith('<'):
+                constants[field] = term[1:-1]
+            else:
+                var_fields.setdefault(term[1:], []).append(field)
+
+        selected = [v[1:] for v in match.group('vars').split()]
+        if any(v not in var_fields for v in selected):
+            return None
+
+        distinct = match.group('distinct') is not None
+        seen = set()
+        results = []
+
+        for triplet in triplets:
+            if any(triplet[field] != value for field, value in constants.items()):
+                continue
+
+            # La misma variable en varios campos debe ligar al mismo valor
+            bindings = {}
+            consistent = True
+            for var, fields in var_fields.items():
+                value = triplet[fields[0]]
+                if any(triplet[field] != value for field in fields[1:]):
+                    consistent = False
+                    break
+                bindings[var] = value
+            if not consistent:
+                continue
+
+            row = {v: bindings[v] for v in selected}
+            if distinct:
+                key = tuple(row[v] for v in selected)
+                if key in seen:
+                    continue
+                seen.add(key)
+            results.append(row)
+
+        return results
+
+    @staticmethod
+    def query_triplets(triplets: List[Dict[str, str]], sparql_query: str,
+                       graph: Optional[Graph] = None) -> List[Dict[str, str]]:
+        """
+        Ejecuta una consulta SPARQL simple sobre las tripletas
+
+        Si el llamador ya tiene el grafo construido (por ejemplo el de
+        CSVToRDFProcessor), puede pasarlo en `graph` para no reconstruirlo.
+        Las consultas de un solo patrón se responden con una pasada directa
+        sobre las tripletas, sin construir grafo ni invocar SPARQL.
+        """
+        if triplets is not None:
+            match = _SIMPLE_SELECT_RE.match(sparql_query)
+            if match:
+                fast = RDFUtilities._query_triplets_fast(triplets, match)
+                if fast is not None:
+                    return fast
+
+        g = graph if graph is not None else RDFUtilities._build_graph(triplets)
+
         # Ejecutar consulta
         results = []
         try:
@@ -51,56 +142,66 @@ class RDFUtilities:
         """
         if not triplets:
             return {}
-        
-        subjects = set(t['subject'] for t in triplets)
-        predicates = set(t['predicate'] for t in triplets)
-        objects = set(t['object'] for t in triplets)
-        datatypes = set(t.get('dataType', '') for t in triplets if t.get('dataType'))
-        
-        # Contar frecuencias de predicados
-        predicate_counts = {}
+
+        # Ruta rápida columnar: si las tripletas vienen como TripletTable,
+        # los conjuntos y Counter operan directo sobre las columnas en C
+        if hasattr(triplets, 'subjects'):
+            unique_subjects = set(triplets.subjects)
+            return {
+                'total_triplets': len(triplets),
+                'unique_subjects': len(unique_subjects),
+                'unique_predicates': len(set(triplets.predicates)),
+                'unique_objects': len(set(triplets.objects)),
+                'unique_datatypes': len(set(dt for dt in triplets.datatypes if dt)),
+                'predicate_frequency': dict(Counter(triplets.predicates)),
+                'datatype_frequency': dict(Counter(
+                    dt if dt is not None else 'unknown' for dt in triplets.datatypes)),
+                'avg_triplets_per_subject': len(triplets) / len(unique_subjects) if unique_subjects else 0
+            }
+
+        subjects = set()
+        predicates = set()
+        objects = set()
+        datatypes = set()
+        predicate_counts = Counter()
+        datatype_counts = Counter()
+
+        # Una sola pasada sobre las tripletas para todos los conjuntos y conteos
         for triplet in triplets:
+            subjects.add(triplet['subject'])
+            objects.add(triplet['object'])
+
             pred = triplet['predicate']
-            predicate_counts[pred] = predicate_counts.get(pred, 0) + 1
-        
-        # Contar tipos de datos
-        datatype_counts = {}
-        for triplet in triplets:
-            dt = triplet.get('dataType', 'unknown')
-            datatype_counts[dt] = datatype_counts.get(dt, 0) + 1
-        
+            predicates.add(pred)
+            predicate_counts[pred] += 1
+
+            dt = triplet.get('dataType')
+            if dt:
+                datatypes.add(dt)
+            datatype_counts[dt if dt is not None else 'unknown'] += 1
+
         return {
             'total_triplets': len(triplets),
             'unique_subjects': len(subjects),
             'unique_predicates': len(predicates),
             'unique_objects': len(objects),
             'unique_datatypes': len(datatypes),
-            'predicate_frequency': predicate_counts,
-            'datatype_frequency': datatype_counts,
+            'predicate_frequency': dict(predicate_counts),
+            'datatype_frequency': dict(datatype_counts),
             'avg_triplets_per_subject': len(triplets) / len(subjects) if subjects else 0
         }
     
     @staticmethod
-    def export_formats(triplets: List[Dict[str, str]]) -> Dict[str, str]:
+    def export_formats(triplets: Optional[List[Dict[str, str]]] = None,
+                       graph: Optional[Graph] = None) -> Dict[str, str]:
         """
         Exporta las tripletas en diferentes formatos RDF
+
+        Acepta las tripletas, un grafo ya construido, o ambos; con `graph`
+        se evita duplicar la inserción que ya hizo el procesador.
         """
-        g = Graph()
-        
-        # Agregar tripletas al grafo
-        for triplet in triplets:
-            subject = URIRef(triplet['subject'])
-            predicate = URIRef(triplet['predicate'])
-            
-            obj_str = triplet['object']
-            if obj_str.startswith('http://') or obj_str.startswith('https://'):
-                obj = URIRef(obj_str)
-            else:
-                datatype = triplet.get('dataType', str(XSD.string))
-                obj = Literal(obj_str, datatype=URIRef(datatype))
-            
-            g.add((subject, predicate, obj))
-        
+        g = graph if graph is not None else RDFUtilities._build_graph(triplets or [])
+
         return {
             'turtle': g.serialize(format='turtle'),
             'rdf_xml': g.serialize(format='xml'),
@@ -114,31 +215,33 @@ class RDFUtilities:
         """
         Valida las URIs en las tripletas
         """
-        invalid_subjects = []
-        invalid_predicates = []
-        invalid_objects = []
-        
+        # Conjuntos desde el inicio: deduplican al agregar, sin pasar por
+        # listas intermedias
+        invalid_subjects = set()
+        invalid_predicates = set()
+        invalid_objects = set()
+
         for triplet in triplets:
             # Validar sujeto
-            if not triplet['subject'].startswith('http://') and not triplet['subject'].startswith('https://'):
-                invalid_subjects.append(triplet['subject'])
-            
+            if not triplet['subject'].startswith(('http://', 'https://')):
+                invalid_subjects.add(triplet['subject'])
+
             # Validar predicado
-            if not triplet['predicate'].startswith('http://') and not triplet['predicate'].startswith('https://'):
-                invalid_predicates.append(triplet['predicate'])
-            
+            if not triplet['predicate'].startswith(('http://', 'https://')):
+                invalid_predicates.add(triplet['predicate'])
+
             # Validar objeto si es URI
             obj = triplet['object']
-            if obj.startswith('http://') or obj.startswith('https://'):
+            if obj.startswith(('http://', 'https://')):
                 try:
                     URIRef(obj)
                 except:
-                    invalid_objects.append(obj)
-        
+                    invalid_objects.add(obj)
+
         return {
-            'invalid_subjects': list(set(invalid_subjects)),
-            'invalid_predicates': list(set(invalid_predicates)),
-            'invalid_objects': list(set(invalid_objects))
+            'invalid_subjects': list(invalid_subjects),
+            'invalid_predicates': list(invalid_predicates),
+            'invalid_objects': list(invalid_objects)
         }
 
 # Función para generar consultas SPARQL comunes